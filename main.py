@@ -1,106 +1,444 @@
 import sys
 import os
-import cv2
+import bisect
+import functools
+import hashlib
+import logging
+import re
 import numpy as np
 import subprocess
 import json
-from pydub import AudioSegment
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QSlider, QPushButton, QFileDialog, QLabel, QMessageBox, QProgressBar,
-    QGroupBox, QDialog, QProgressDialog, QSizePolicy
+    QGroupBox, QDialog, QProgressDialog, QSizePolicy, QCheckBox
 )
-from PySide6.QtGui import QShortcut, QKeySequence, QPainter, QColor, QFont
-from PySide6.QtCore import Qt, QTimer, QUrl, QRect
+from PySide6.QtGui import QShortcut, QKeySequence, QPainter, QColor, QFont, QFontMetrics, QPixmap
+from PySide6.QtCore import Qt, QTimer, QElapsedTimer, QUrl, QRect, QSize, QObject, QThread, Signal
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PySide6.QtMultimediaWidgets import QVideoWidget
 
+try:
+    import av  # Optional, lets us probe videos without spawning ffprobe
+except ImportError:
+    av = None
+
+logger = logging.getLogger("videoeditor")
+
+# Saved states are .npz archives, which are zip files
+NPZ_MAGIC = b'PK\x03\x04'
+
+# Silence detection results are cached here, see SilenceDetector.detect_blocks
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "videoeditor")
+
+# Matches the silence_start/silence_end events logged by ffmpeg's silencedetect
+SILENCE_RE = re.compile(rb'silence_(start|end): (-?[\d.]+(?:e[-+]?\d+)?)')
+
+# Resolved once up front. subprocess only launches through posix_spawn (instead of
+# fork+exec) when the program is given as a path and close_fds is off; our own
+# descriptors are non-inheritable anyway, so nothing leaks into ffmpeg.
+FFMPEG = shutil.which("ffmpeg") or "ffmpeg"
+FFPROBE = shutil.which("ffprobe") or "ffprobe"
+
+HELP_TEXT = """
+Hotkeys:
+- Space: Play/Pause
+- Left Arrow: Go to Previous Block
+- Right Arrow: Go to Next Block
+- T: Toggle Mode (Green/Red)
+- +: Zoom In
+- -: Zoom Out
+
+Buttons:
+- Open Video: Open a video file
+- Play/Pause: Control video playback
+- Previous Block: Move to the previous block
+- Next Block: Move to the next block
+- Toggle Mode: Switch between Green (include) and Red (exclude) modes
+- Save State: Save current block states to a file
+- Load State: Load previously saved block states
+- Reset Blocks: Reset all blocks to unvisited state
+- Export Green Blocks: Export a new video with only included blocks
+- Zoom In: Increase the number of visible blocks
+- Zoom Out: Decrease the number of visible blocks
+
+Modes:
+- Green Mode: Blocks the playhead passes through will be included
+- Red Mode: Blocks the playhead passes through will be excluded
+"""
+
 def check_ffmpeg():
     try:
-        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess.run([FFMPEG, "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       close_fds=False)
         return True
     except FileNotFoundError:
         return False
 
-class AudioBlock:
-    def __init__(self, start, end, is_silence):
-        self.start = start
-        self.end = end
-        self.is_silence = is_silence
-        self.include = not is_silence  # By default, include non-silence blocks
-        self.visited = False  # Track if playhead has visited this block
-
-    def to_dict(self):
+def probe_video(video_path):
+    """Probe the duration and the codecs of the first video and audio stream.
+
+    Uses PyAV in-process when it is installed, otherwise a single ffprobe call.
+    audio_codec is None for videos without an audio stream. Raises ValueError
+    if there is no video stream or the duration can't be determined.
+    """
+    # Cached per file version, like the silence detection results
+    stat = os.stat(video_path)
+    return _probe_video(video_path, stat.st_mtime_ns, stat.st_size)
+
+@functools.lru_cache(maxsize=8)
+def _probe_video(video_path, mtime_ns, size):
+    if av is not None:
+        try:
+            return _probe_video_av(video_path)
+        except (av.error.FFmpegError, ValueError):
+            pass  # Let ffprobe have a go, it reports errors more helpfully
+    return _probe_video_ffprobe(video_path)
+
+def _probe_video_av(video_path):
+    with av.open(video_path) as container:
+        if not container.streams.video:
+            raise ValueError(f"No video stream in {video_path}")
+        video = container.streams.video[0]
+        audio = container.streams.audio[0] if container.streams.audio else None
+
+        # Some containers only know the duration per stream
+        if container.duration is not None:
+            duration = container.duration / av.time_base
+        elif video.duration is not None:
+            duration = float(video.duration * video.time_base)
+        else:
+            raise ValueError(f"Could not determine the duration of {video_path}")
+
+        frame_rate = video.base_rate or video.average_rate
         return {
-            'start': self.start,
-            'end': self.end,
-            'is_silence': self.is_silence,
-            'include': self.include,
-            'visited': self.visited
+            'duration': duration,
+            'video_codec': video.codec_context.name,
+            'audio_codec': audio.codec_context.name if audio else None,
+            'frame_rate': float(frame_rate),
+            'audio_bitrate': (audio.bit_rate if audio else None) or '192k'
         }
 
-    @classmethod
-    def from_dict(cls, data):
-        block = cls(data['start'], data['end'], data['is_silence'])
-        block.include = data['include']
-        block.visited = data['visited']
-        return block
+def _probe_video_ffprobe(video_path):
+    cmd = [
+        FFPROBE,
+        "-v", "error",
+        "-show_entries", "format=duration:stream=codec_type,codec_name,r_frame_rate,bit_rate,duration",
+        "-of", "json",
+        video_path
+    ]
+    info = json.loads(subprocess.check_output(cmd, stdin=subprocess.DEVNULL, close_fds=False).decode())
+    streams = info.get('streams', [])
+    video_info = next((stream for stream in streams if stream['codec_type'] == 'video'), None)
+    audio_info = next((stream for stream in streams if stream['codec_type'] == 'audio'), None)
+    if video_info is None:
+        raise ValueError(f"No video stream in {video_path}")
+
+    # Some containers only know the duration per stream
+    duration = info['format'].get('duration') or video_info.get('duration')
+    if duration is None:
+        raise ValueError(f"Could not determine the duration of {video_path}")
+    
+    # Parse frame rate fraction
+    num, den = map(int, video_info['r_frame_rate'].split('/'))
+    frame_rate = num/den
+    
+    return {
+        'duration': float(duration),
+        'video_codec': video_info['codec_name'],
+        'audio_codec': audio_info['codec_name'] if audio_info else None,
+        'frame_rate': frame_rate,
+        'audio_bitrate': audio_info.get('bit_rate', '192k') if audio_info else '192k'
+    }
+
+def probe_duration(video_path):
+    """Probe just the duration, reading as little of the file as ffprobe allows"""
+    stat = os.stat(video_path)
+    return _probe_duration(video_path, stat.st_mtime_ns, stat.st_size)
+
+@functools.lru_cache(maxsize=8)
+def _probe_duration(video_path, mtime_ns, size):
+    if av is None:
+        cmd = [
+            FFPROBE,
+            "-v", "error",
+            "-probesize", "32k",
+            "-analyzeduration", "0",
+            "-show_entries", "format=duration",
+            "-of", "default=nw=1:nk=1",
+            video_path
+        ]
+        try:
+            return float(subprocess.check_output(cmd, stdin=subprocess.DEVNULL, close_fds=False))
+        except (subprocess.CalledProcessError, ValueError):
+            pass  # Some containers need a larger probe, fall back to the full one
+    # PyAV probes in-process, and the full probe is cached for the export too
+    return probe_video(video_path)['duration']
+
+# Hardware encoders to try for each codec, in order of preference, with the
+# options they are used with. The quality settings roughly match the software
+# encoder's default (CRF 23 for libx264).
+HW_ENCODERS = {
+    'h264': [("h264_nvenc", ["-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "0"]),
+             ("h264_qsv", ["-global_quality", "23"])],
+}
+
+@functools.lru_cache(maxsize=None)
+def detect_hw_encoder(codec):
+    """Return (encoder, options) of the first working hardware encoder for codec, or None"""
+    try:
+        listed = subprocess.run([FFMPEG, "-hide_banner", "-encoders"],
+                                capture_output=True, close_fds=False).stdout
+    except OSError:
+        return None
+
+    for encoder, options in HW_ENCODERS.get(codec, []):
+        if encoder.encode() not in listed:
+            continue
+        # Builds list encoders for hardware that isn't there, so try a few frames
+        test = subprocess.run([
+            FFMPEG, "-hide_banner", "-v", "error",
+            "-f", "lavfi", "-i", "color=size=256x256:rate=25:duration=0.2",
+            "-c:v", encoder, *options,
+            "-f", "null", "-"
+        ], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+           close_fds=False)
+        if test.returncode == 0:
+            return encoder, options
+    return None
+
+class AudioBlock:
+    """View onto a single block stored in a BlockManager's arrays"""
+    __slots__ = ('_manager', 'index')
+
+    def __init__(self, manager, index):
+        self._manager = manager
+        self.index = index
+
+    @property
+    def start(self):
+        return float(self._manager.starts[self.index])
+
+    @property
+    def end(self):
+        return float(self._manager.ends[self.index])
+
+    @property
+    def is_silence(self):
+        return bool(self._manager.is_silence[self.index])
+
+    @property
+    def include(self):
+        return bool(self._manager.include[self.index])
+
+    @include.setter
+    def include(self, value):
+        self._manager.include[self.index] = value
+
+    @property
+    def visited(self):
+        return bool(self._manager.visited[self.index])
+
+    @visited.setter
+    def visited(self, value):
+        self._manager.visited[self.index] = value
+
+class BlockList:
+    """Sequence of AudioBlock views over a BlockManager's arrays"""
+    __slots__ = ('_manager',)
+
+    def __init__(self, manager):
+        self._manager = manager
+
+    def __len__(self):
+        return len(self._manager.starts)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("block index out of range")
+        return AudioBlock(self._manager, index)
+
+    @property
+    def starts(self):
+        return self._manager.starts
+
+    @property
+    def ends(self):
+        return self._manager.ends
+
+    @property
+    def is_silence(self):
+        return self._manager.is_silence
+
+    @property
+    def include(self):
+        return self._manager.include
+
+    @property
+    def visited(self):
+        return self._manager.visited
 
 class BlockManager:
+    """Stores the blocks as parallel arrays (one entry per block)"""
+    # Skipping silence only lands on non-silence blocks at least this long (seconds),
+    # shorter ones make playback unstable
+    MIN_PLAYABLE_DURATION = 0.3
+    # Non-silence blocks shorter than this are skipped while playing through them
+    MIN_BLOCK_DURATION = 0.2
+
     def __init__(self):
-        self.blocks = []
         self.video_path = None
+        self.blocks = BlockList(self)
+        self.set_blocks([], [], [])
 
     def set_video_path(self, video_path):
         """Just set the video path without processing blocks"""
         self.video_path = video_path
-        self.blocks = []
+        self.set_blocks([], [], [])
+
+    def set_blocks(self, starts, ends, is_silence, include=None, visited=None):
+        """Replace all blocks. By default non-silence blocks are included and none are visited"""
+        # float32 stays within about a millisecond even for videos several hours
+        # long, at half the memory traffic of float64 when painting and searching
+        self.starts = np.asarray(starts, dtype=np.float32)
+        self.ends = np.asarray(ends, dtype=np.float32)
+        self.is_silence = np.asarray(is_silence, dtype=bool)
+        self.include = ~self.is_silence if include is None else np.array(include, dtype=bool)
+        self.visited = np.zeros(len(self.starts), dtype=bool) if visited is None else np.array(visited, dtype=bool)
+        self.rebuild_indexes()
 
     def process_blocks(self):
         """Process the video to detect silence blocks"""
         if not self.video_path:
             return False
         silence_detector = SilenceDetector(self.video_path)
-        self.blocks = silence_detector.detect_blocks()
+        self.set_blocks(*silence_detector.detect_blocks())
         return True
 
+    def rebuild_indexes(self, min_dur=None):
+        """Rebuild the lookup tables used to locate blocks and skip silence.
+
+        Needs to run whenever the block boundaries change. min_dur defaults
+        to MIN_PLAYABLE_DURATION.
+        """
+        if min_dur is None:
+            min_dur = self.MIN_PLAYABLE_DURATION
+        self._starts_list = self.starts.tolist()
+        self._nonsilence_indices = np.flatnonzero(~self.is_silence)
+
+        durations = self.ends.astype(np.float64) - self.starts
+        # Playback always skips these, whatever their include state
+        self._too_short = ~self.is_silence & (durations < self.MIN_BLOCK_DURATION)
+
+        # _next_playable[i] is the first block j >= i that skipping silence may
+        # land on, or len(blocks) if there is none
+        count = len(self.starts)
+        playable = ~self.is_silence & (durations >= min_dur)
+        candidates = np.where(playable, np.arange(count), count)
+        self._next_playable = np.append(np.minimum.accumulate(candidates[::-1])[::-1], count)
+
+    def find_block_index(self, position):
+        """Return the index of the block containing position (in seconds)"""
+        index = bisect.bisect_right(self._starts_list, position) - 1
+        return max(0, min(index, len(self.blocks) - 1))
+
+    def find_next_playable_block(self, start_index):
+        """Return the index of the first block from start_index that skipping silence may land on.
+
+        Returns len(blocks) if no such block is left.
+        """
+        return int(self._next_playable[min(start_index, len(self.starts))])
+
+    def is_too_short(self, index):
+        """Return whether the block is non-silence shorter than MIN_BLOCK_DURATION"""
+        return bool(self._too_short[index])
+
+    def find_next_non_silence_block(self, start_index, forward=True):
+        """Return the index of the nearest non-silence block after (or before) start_index"""
+        indices = self._nonsilence_indices
+        if forward:
+            pos = int(np.searchsorted(indices, start_index, side='right'))
+            if pos < len(indices):
+                return int(indices[pos])
+        else:
+            pos = int(np.searchsorted(indices, start_index, side='left'))
+            if pos > 0:
+                return int(indices[pos - 1])
+        return None
+
+    def mark_visited(self, index, include):
+        """Mark a block as visited with the given include state, returns True if that changed it"""
+        changed = not self.visited[index] or self.include[index] != include
+        self.visited[index] = True
+        self.include[index] = include
+        return changed
+
     def save_state(self, filepath):
         if not self.blocks:
             return False
         
-        state = {
-            'video_path': self.video_path,
-            'blocks': [block.to_dict() for block in self.blocks]
-        }
-        
         try:
-            with open(filepath, 'w') as f:
-                json.dump(state, f)
+            # Write through a file object so numpy doesn't append ".npz" to the name
+            with open(filepath, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    video_path=np.array(self.video_path),
+                    starts=self.starts,
+                    ends=self.ends,
+                    is_silence=self.is_silence,
+                    include=self.include,
+                    visited=self.visited,
+                )
             return True
         except Exception as e:
-            print(f"Error saving state: {e}")
+            logger.error("Error saving state: %s", e)
             return False
 
     def load_state(self, filepath):
         try:
-            with open(filepath, 'r') as f:
-                state = json.load(f)
-            
-            self.video_path = state['video_path']
-            self.blocks = [AudioBlock.from_dict(block_data) for block_data in state['blocks']]
+            with open(filepath, 'rb') as f:
+                magic = f.read(len(NPZ_MAGIC))
+
+            if magic == NPZ_MAGIC:
+                with np.load(filepath) as state:
+                    self.video_path = str(state['video_path'])
+                    self.set_blocks(state['starts'], state['ends'], state['is_silence'],
+                                    include=state['include'], visited=state['visited'])
+            else:
+                # States saved by older versions are JSON
+                self._load_json_state(filepath)
+
             # Get the duration from the last block's end time
             if self.blocks:
                 self.duration = self.blocks[-1].end
             return True
         except Exception as e:
-            print(f"Error loading state: {e}")
+            logger.error("Error loading state: %s", e)
             return False
 
+    def _load_json_state(self, filepath):
+        with open(filepath, 'r') as f:
+            state = json.load(f)
+
+        blocks = state['blocks']
+        self.video_path = state['video_path']
+        self.set_blocks(
+            [block['start'] for block in blocks],
+            [block['end'] for block in blocks],
+            [block['is_silence'] for block in blocks],
+            include=[block['include'] for block in blocks],
+            visited=[block['visited'] for block in blocks],
+        )
+
     def reset_blocks(self):
-        for block in self.blocks:
-            if not block.is_silence:
-                block.visited = False
-                block.include = True
+        self.visited[~self.is_silence] = False
+        self.include[~self.is_silence] = True
 
 class CustomSlider(QSlider):
     def __init__(self, orientation, parent=None):
@@ -122,6 +460,14 @@ class CustomSlider(QSlider):
         """)
 
 class BlockTimeline(QWidget):
+    COL_SILENCE = QColor(200, 200, 200, 100)  # Light gray for silence
+    COL_INCLUDED = QColor(0, 255, 0, 100)  # Green for included non-silence
+    COL_EXCLUDED = QColor(255, 0, 0, 100)  # Red for excluded non-silence
+    COL_UNVISITED = QColor(150, 150, 150, 100)  # Neutral color for unvisited blocks
+
+    # Block colors, indexed by the category computed in _renderBlocks
+    COLORS = (COL_SILENCE, COL_INCLUDED, COL_EXCLUDED, COL_UNVISITED)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.blocks = []
@@ -130,29 +476,54 @@ class BlockTimeline(QWidget):
         self.setMinimumHeight(60)
         self.total_duration = 0
 
+        # Fonts need a QGuiApplication, so this one can't be a class constant
+        self._zoom_font = QFont("Arial", 10)
+        self._zoom_pixmap = None
+
+        # Pre-rendered blocks, reused until the visible range or block state changes
+        self._cache_pixmap = None
+        self._cache_key = None
+        self._last_position_x = None
+
     def setBlocks(self, blocks, total_duration):
         self.blocks = blocks
         self.total_duration = total_duration
+        self._cache_pixmap = None
+        self.update()
+
+    def invalidate(self):
+        """Re-render the blocks after their visited/include state was modified"""
+        self._cache_pixmap = None
         self.update()
 
     def setCurrentPosition(self, position):
         self.current_position = position
-        self.update()
+        if not self.blocks or self.total_duration == 0 or self._last_position_x is None:
+            self.update()
+            return
+
+        start_index, end_index = self._visibleRange()
+        if self._cache_pixmap is None or self._cache_key != (start_index, end_index, self.width(), self.height()):
+            # The visible range scrolled, so the whole timeline needs repainting
+            self.update()
+            return
+
+        # Only the stripe between the old and the new playhead needs repainting
+        old_x = self._last_position_x
+        new_x = self._positionX(start_index, end_index)
+        self.update(QRect(min(old_x, new_x) - 2, 0, abs(new_x - old_x) + 4, self.height()))
 
     def setVisibleBlocks(self, visible_blocks):
         self.visible_blocks = visible_blocks
+        self._cache_pixmap = None
+        self._zoom_pixmap = None
         self.update()
 
-    def paintEvent(self, event):
-        if not self.blocks or self.total_duration == 0:
-            return
-
-        painter = QPainter(self)
-        width = self.width()
-        height = self.height()
-
+    def _visibleRange(self):
+        """Return the (start_index, end_index) of the blocks around the current position"""
         # Find the current block
-        current_block_index = next((i for i, block in enumerate(self.blocks) if block.start <= self.current_position <= block.end), 0)
+        current_block_index = int(np.searchsorted(self.blocks.starts, self.current_position, side='right')) - 1
+        current_block_index = max(0, min(current_block_index, len(self.blocks) - 1))
 
         # Calculate the range of blocks to display
         start_index = max(0, current_block_index - self.visible_blocks // 2)
@@ -162,47 +533,116 @@ class BlockTimeline(QWidget):
         if end_index - start_index < self.visible_blocks:
             start_index = max(0, end_index - self.visible_blocks)
 
-        visible_blocks = self.blocks[start_index:end_index]
+        return start_index, end_index
+
+    def _positionX(self, start_index, end_index):
+        """Return the x coordinate of the playhead for the given visible range"""
+        time_start = self.blocks.starts[start_index]
+        time_range = self.blocks.ends[end_index - 1] - time_start
+        return int(((self.current_position - time_start) / time_range) * self.width())
+
+    def _renderBlocks(self, start_index, end_index, width, height):
+        """Render the visible blocks into a pixmap"""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(self.size() * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+
+        # The arrays are read through the BlockList every time, the manager
+        # replaces them whenever the blocks change
+        blocks = self.blocks
+        starts = blocks.starts[start_index:end_index]
+        ends = blocks.ends[start_index:end_index]
+        time_start = starts[0]
+        time_range = ends[-1] - time_start
+
+        scale = width / time_range
+        xs = ((starts - time_start) * scale).astype(np.int32)
+        widths = ((ends - time_start) * scale).astype(np.int32) - xs
+
+        # Only visited non-silence blocks are colored green/red
+        categories = np.where(
+            blocks.is_silence[start_index:end_index], 0,
+            np.where(blocks.visited[start_index:end_index],
+                     np.where(blocks.include[start_index:end_index], 1, 2), 3)
+        )
 
-        # Calculate the time range for the visible blocks
-        time_start = visible_blocks[0].start
-        time_end = visible_blocks[-1].end
-        time_range = time_end - time_start
+        # Everything is axis-aligned and integer-aligned, antialiasing only costs time
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        for x, w, category in zip(xs.tolist(), widths.tolist(), categories.tolist()):
+            painter.fillRect(x, 0, w, height - 20, self.COLORS[category])
+        painter.end()
+        return pixmap
+
+    def _renderZoomText(self):
+        """Render the zoom level indicator into a pixmap, it only changes on zoom"""
+        text = f"Zoom: {self.visible_blocks} blocks"
+        text_width = QFontMetrics(self._zoom_font).horizontalAdvance(text) + 1
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(QSize(text_width, 20) * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setPen(Qt.black)
+        painter.setFont(self._zoom_font)
+        painter.drawText(0, 0, text_width, 20, Qt.AlignRight, text)
+        painter.end()
+        return pixmap
 
-        for block in visible_blocks:
-            start_x = int(((block.start - time_start) / time_range) * width)
-            end_x = int(((block.end - time_start) / time_range) * width)
-            
-            if block.is_silence:
-                color = QColor(200, 200, 200, 100)  # Light gray for silence
-            elif block.visited:  # Only color visited blocks
-                if block.include:
-                    color = QColor(0, 255, 0, 100)  # Green for included non-silence
-                else:
-                    color = QColor(255, 0, 0, 100)  # Red for excluded non-silence
-            else:
-                color = QColor(150, 150, 150, 100)  # Neutral color for unvisited blocks
+    def paintEvent(self, event):
+        if not self.blocks or self.total_duration == 0:
+            return
 
-            painter.fillRect(start_x, 0, end_x - start_x, height - 20, color)
+        width = self.width()
+        height = self.height()
+
+        start_index, end_index = self._visibleRange()
+
+        # Only re-render the blocks when the visible range or block state changed
+        cache_key = (start_index, end_index, width, height)
+        if self._cache_pixmap is None or self._cache_key != cache_key:
+            self._cache_pixmap = self._renderBlocks(start_index, end_index, width, height)
+            self._cache_key = cache_key
+
+        # Only blit the part of the pixmap Qt asked us to repaint
+        rect = event.rect()
+        ratio = self._cache_pixmap.devicePixelRatio()
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
+        painter.drawPixmap(rect, self._cache_pixmap, QRect(rect.topLeft() * ratio, rect.size() * ratio))
 
         # Draw a marker for the current position
         painter.setPen(Qt.blue)
-        position_x = int(((self.current_position - time_start) / time_range) * width)
+        position_x = self._positionX(start_index, end_index)
         painter.drawLine(position_x, 0, position_x, height - 20)
+        self._last_position_x = position_x
 
-        # Draw zoom level indicator
-        painter.setPen(Qt.black)
-        painter.setFont(QFont("Arial", 10))
-        painter.drawText(0, height - 20, width, 20, Qt.AlignRight, f"Zoom: {self.visible_blocks} blocks")
+        # Draw zoom level indicator, unless the repainted area doesn't reach it
+        if rect.bottom() >= height - 20:
+            if self._zoom_pixmap is None:
+                self._zoom_pixmap = self._renderZoomText()
+            zoom_width = self._zoom_pixmap.width() / self._zoom_pixmap.devicePixelRatio()
+            painter.drawPixmap(int(width - zoom_width), height - 20, self._zoom_pixmap)
 
 class VideoPlayer(QMainWindow):
-    def __init__(self, debug=False):
+    # Number of blocks cut by a single ffmpeg process when exporting
+    EXPORT_SHARD_SIZE = 32
+
+    def __init__(self):
         super().__init__()
-        self.debug = debug
         self.block_manager = BlockManager()
         self.current_block_index = 0
         self.last_jumped_block_index = 0
         self.green_mode = True
+        self.use_hw_encoder = True  # Export MP4s with a GPU encoder when one is available
+        self.export_format = 'mp4'  # Last format chosen in confirm_export, offered first next time
+        self._help_dialog = None
+        self._export_dialog = None
+        self._export_gpu_checkbox = None
+        self._export_formats = {}
 
         self.setWindowTitle("Video Player with Block Editor")
         self.setGeometry(100, 100, 400, 600)  # Reduced initial width to 400
@@ -359,17 +799,38 @@ class VideoPlayer(QMainWindow):
         self.shortcut_zoom_out = QShortcut(QKeySequence(Qt.Key_Minus), self)
         self.shortcut_zoom_out.activated.connect(self.zoom_out)
 
+        # Last values reported by the player's signals, so the handlers don't
+        # query the media backend for them on every tick (milliseconds)
+        self._pos_ms = 0
+        self._dur_ms = 0
+
         # Timer for skipping silences
         self.skip_timer = QTimer(self)
         self.skip_timer.timeout.connect(self.skip_silence)
 
+        # Timer coalescing position updates into at most 20 UI refreshes per second.
+        # It only runs while an update is pending, see _schedule_ui_flush.
+        self._ui_dirty = False
+        self._progress_pending = False
+        self._pending_position = 0
+        self.ui_timer = QTimer(self)
+        self.ui_timer.setInterval(50)
+        self.ui_timer.timeout.connect(self._flush_ui)
+
+        # The progress bar is refreshed at most 10 times per second, and only
+        # when the shown percentage changes
+        self._last_progress_pct = -1
+        self._last_progress_update_ms = -1000
+        self._progress_elapsed = QElapsedTimer()
+        self._progress_elapsed.start()
+
     def save_state(self):
         if not self.block_manager.blocks:
             QMessageBox.warning(self, "Warning", "No blocks to save!")
             return
 
         filepath, _ = QFileDialog.getSaveFileName(
-            self, "Save Block State", "", "JSON Files (*.json)"
+            self, "Save Block State", "", "Block State Files (*.npz)"
         )
         if filepath:
             if self.block_manager.save_state(filepath):
@@ -379,7 +840,7 @@ class VideoPlayer(QMainWindow):
 
     def load_state(self):
         filepath, _ = QFileDialog.getOpenFileName(
-            self, "Load Block State", "", "JSON Files (*.json)"
+            self, "Load Block State", "", "Block State Files (*.npz *.json)"
         )
         if filepath:
             if self.block_manager.load_state(filepath):
@@ -387,6 +848,10 @@ class VideoPlayer(QMainWindow):
                 self.media_player.setSource(QUrl.fromLocalFile(self.block_manager.video_path))
                 self.current_block_index = 0
                 self.last_jumped_block_index = 0
+
+                # Show the loaded blocks right away. Reloading the current video
+                # doesn't emit durationChanged, so the handler below may never run.
+                self.block_timeline.setBlocks(self.block_manager.blocks, self._dur_ms / 1000.0)
                 
                 # Wait for media player to load and get duration
                 def on_duration_changed(duration):
@@ -404,7 +869,7 @@ class VideoPlayer(QMainWindow):
             return
         
         self.block_manager.reset_blocks()
-        self.block_timeline.update()
+        self.block_timeline.invalidate()
 
     def enable_controls(self):
         self.play_pause_button.setEnabled(True)
@@ -426,109 +891,127 @@ class VideoPlayer(QMainWindow):
         self.update_mode_label()
 
     def get_video_properties(self, video_path):
-        """Get video properties using ffprobe"""
-        cmd = [
-            "ffprobe",
-            "-v", "error",
-            "-select_streams", "v:0",
-            "-show_entries", "stream=r_frame_rate,codec_name",
-            "-of", "json",
-            video_path
-        ]
-        video_info = json.loads(subprocess.check_output(cmd).decode())
-        
-        cmd = [
-            "ffprobe",
-            "-v", "error",
-            "-select_streams", "a:0",
-            "-show_entries", "stream=codec_name,bit_rate",
-            "-of", "json",
-            video_path
-        ]
-        audio_info = json.loads(subprocess.check_output(cmd).decode())
-        
-        # Parse frame rate fraction
-        num, den = map(int, video_info['streams'][0]['r_frame_rate'].split('/'))
-        frame_rate = num/den
-        
-        return {
-            'video_codec': video_info['streams'][0]['codec_name'],
-            'audio_codec': audio_info['streams'][0]['codec_name'],
-            'frame_rate': frame_rate,
-            'audio_bitrate': audio_info['streams'][0].get('bit_rate', '192k')
-        }
+        """Get video properties through probe_video (PyAV, or ffprobe without it)"""
+        return dict(probe_video(video_path))
 
     def export_green_blocks(self):
         if not self.block_manager.video_path or not self.block_manager.blocks:
             return
 
+        try:
+            # Get video properties
+            props = self.get_video_properties(self.block_manager.video_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Export Error", f"Error reading video properties: {str(e)}")
+            return
+        if props['audio_codec'] is None:
+            QMessageBox.warning(self, "Export Error", "The video has no audio stream to export!")
+            return
+
+        export_format = self.confirm_export()
+        if export_format is None:
+            return
+
         # Get output file path
+        file_filter = "WebM Files (*.webm)" if export_format == 'webm' else "Video Files (*.mp4)"
         output_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Exported Video", "", "Video Files (*.mp4)"
+            self, "Save Exported Video", "", file_filter
         )
         if not output_path:
             return
 
-        # Create temporary directory for segments
-        temp_dir = os.path.abspath("temp_segments")
-        os.makedirs(temp_dir, exist_ok=True)
+        # Create a private temporary directory for segments
+        temp_dir = tempfile.mkdtemp(prefix="videoeditor_seg_")
 
         try:
-            # Get video properties
-            props = self.get_video_properties(self.block_manager.video_path)
+            if export_format == 'webm':
+                video_codec_args = ["-c:v", "libvpx-vp9", "-crf", "32", "-b:v", "0"]
+                audio_codec = "libopus"
+            else:
+                # Encode as H.264, on the GPU if possible
+                video_codec_args = ["-c:v", "libx264"]
+                audio_codec = props['audio_codec']
+                hw_encoder = detect_hw_encoder('h264') if self.use_hw_encoder else None
+                if hw_encoder:
+                    encoder, options = hw_encoder
+                    video_codec_args = ["-c:v", encoder, *options]
             
             # Get included blocks (only those that are both visited and marked as included)
-            included_blocks = [block for block in self.block_manager.blocks if not block.is_silence and block.visited and block.include]
+            manager = self.block_manager
+            included = ~manager.is_silence & manager.visited & manager.include
+            included_blocks = list(zip(manager.starts[included].tolist(), manager.ends[included].tolist()))
             
             if not included_blocks:
                 QMessageBox.warning(self, "Export Error", "No blocks selected for export!")
                 return
 
-            # Create segments list file
+            def extract_shard(index, shard):
+                segment_name = f"segment_{index}.{export_format}"
+                segment_path = os.path.join(temp_dir, segment_name)
+
+                # Seek to the shard so ffmpeg only decodes its span. Timestamps
+                # restart at 0 after -ss, so the blocks are made relative to it.
+                shard_start = shard[0][0]
+                shard_end = max(start + max(0.1, end - start) for start, end in shard)
+
+                # Trim every block out of a copy of the streams and join them with
+                # the concat filter. Unlike select/aselect, atrim cuts audio frames
+                # at the exact sample, so audio and video stay the same length.
+                count = len(shard)
+                filters = [
+                    "[0:v]split={0}{1}".format(count, "".join(f"[vin{i}]" for i in range(count))),
+                    "[0:a]asplit={0}{1}".format(count, "".join(f"[ain{i}]" for i in range(count))),
+                ]
+                for i, (start, end) in enumerate(shard):
+                    # Ensure every block lasts at least 0.1 seconds
+                    trim = "start={:.3f}:end={:.3f}".format(start - shard_start, start - shard_start + max(0.1, end - start))
+                    filters.append(f"[vin{i}]trim={trim},setpts=PTS-STARTPTS[v{i}]")
+                    filters.append(f"[ain{i}]atrim={trim},asetpts=PTS-STARTPTS[a{i}]")
+                filters.append("{0}concat=n={1}:v=1:a=1[v][a]".format(
+                    "".join(f"[v{i}][a{i}]" for i in range(count)), count))
+                filter_graph = ";".join(filters)
+
+                # Cut all blocks of the shard in one ffmpeg pass, all with the same encoding settings
+                subprocess.run([
+                    FFMPEG, "-y",
+                    "-ss", "{:.3f}".format(shard_start),
+                    "-t", "{:.3f}".format(shard_end - shard_start),
+                    "-i", self.block_manager.video_path,
+                    "-filter_complex", filter_graph,
+                    "-map", "[v]",
+                    "-map", "[a]",
+                    *video_codec_args,
+                    "-c:a", audio_codec,
+                    "-r", str(props['frame_rate']),
+                    "-b:a", str(props['audio_bitrate']),
+                    segment_path
+                ], stdin=subprocess.DEVNULL, check=True, close_fds=False)
+                return segment_name
+
+            # Group the blocks into shards cut by one ffmpeg each, and run a few
+            # of them at once. ffmpeg is multithreaded itself, the pool is small.
+            shard_size = self.EXPORT_SHARD_SIZE
+            shards = [included_blocks[i:i + shard_size] for i in range(0, len(included_blocks), shard_size)]
+            with ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 1) // 4)) as executor:
+                segment_names = list(executor.map(extract_shard, range(len(shards)), shards))
+
+            # Create segments list file, in block order
             segments_file = os.path.join(temp_dir, "segments.txt")
             with open(segments_file, "w") as f:
-                for i, block in enumerate(included_blocks):
-                    # Extract segment
-                    segment_name = f"segment_{i}.mp4"
-                    segment_path = os.path.join(temp_dir, segment_name)
-                    
-                    # Calculate duration and ensure it's at least 0.1 seconds
-                    duration = max(0.1, block.end - block.start)
-                    
-                    # Format timestamps with fixed precision
-                    start_time = "{:.3f}".format(block.start)
-                    duration_str = "{:.3f}".format(duration)
-                    
-                    # Cut segment using ffmpeg with matched properties
-                    subprocess.run([
-                        "ffmpeg", "-y",
-                        "-ss", start_time,
-                        "-t", duration_str,
-                        "-i", self.block_manager.video_path,
-                        "-c:v", props['video_codec'],
-                        "-c:a", props['audio_codec'],
-                        "-r", str(props['frame_rate']),
-                        "-b:a", str(props['audio_bitrate']),
-                        "-copyts",
-                        "-avoid_negative_ts", "make_zero",
-                        segment_path
-                    ], check=True)
-                    
+                for segment_name in segment_names:
                     # Write to segments list with relative path
                     f.write(f"file '{segment_name}'\n")
 
-            # Concatenate all segments with matched properties
+            # Concatenate all shards. They were all encoded with the same
+            # properties above, so the streams are copied instead of re-encoded.
             subprocess.run([
-                "ffmpeg", "-y",
+                FFMPEG, "-y",
                 "-f", "concat",
                 "-safe", "0",
                 "-i", segments_file,
-                "-c:v", props['video_codec'],
-                "-c:a", props['audio_codec'],
-                "-r", str(props['frame_rate']),
-                "-b:a", str(props['audio_bitrate']),
+                "-c", "copy",
                 output_path
-            ], check=True)
+            ], stdin=subprocess.DEVNULL, check=True, close_fds=False)
 
             QMessageBox.information(self, "Export Complete", "Video export completed successfully!")
 
@@ -539,16 +1022,7 @@ class VideoPlayer(QMainWindow):
 
         finally:
             # Clean up temporary files
-            if os.path.exists(temp_dir):
-                for file in os.listdir(temp_dir):
-                    try:
-                        os.remove(os.path.join(temp_dir, file))
-                    except:
-                        pass
-                try:
-                    os.rmdir(temp_dir)
-                except:
-                    pass
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
     def open_file(self):
         file_dialog = QFileDialog(self)
@@ -565,13 +1039,7 @@ class VideoPlayer(QMainWindow):
                                        QMessageBox.Yes | QMessageBox.No)
             
             if reply == QMessageBox.Yes:
-                if self.block_manager.process_blocks():
-                    self.current_block_index = 0
-                    self.last_jumped_block_index = 0
-                    self.block_timeline.setBlocks(self.block_manager.blocks, self.media_player.duration() / 1000.0)
-                    self.enable_controls()
-                else:
-                    QMessageBox.warning(self, "Error", "Failed to process blocks!")
+                self.start_block_processing()
             else:
                 # Only enable basic controls when blocks aren't processed
                 self.play_pause_button.setEnabled(True)
@@ -583,6 +1051,65 @@ class VideoPlayer(QMainWindow):
             self.audio_output.setVolume(1.0)
             
 
+    def start_block_processing(self):
+        """Detect silence blocks on a worker thread so the UI stays responsive"""
+        self.processing_dialog = self.show_processing_dialog()
+
+        self.silence_thread = QThread(self)
+        self.silence_worker = SilenceWorker(self.block_manager.video_path)
+        self.silence_worker.moveToThread(self.silence_thread)
+        self.silence_thread.started.connect(self.silence_worker.run)
+        self.silence_worker.progress.connect(self.on_blocks_progress)
+        self.silence_worker.finished.connect(self.on_blocks_processed)
+        self.silence_worker.failed.connect(self.on_blocks_failed)
+        self.silence_worker.cancelled.connect(self.on_blocks_cancelled)
+        self.silence_worker.finished.connect(self.silence_thread.quit)
+        self.silence_worker.failed.connect(self.silence_thread.quit)
+        self.silence_worker.cancelled.connect(self.silence_thread.quit)
+        self.processing_dialog.canceled.connect(self.cancel_block_processing)
+        self.silence_thread.finished.connect(self.silence_worker.deleteLater)
+        self.silence_thread.finished.connect(self.silence_thread.deleteLater)
+        self.silence_thread.start()
+
+    def cancel_block_processing(self):
+        # Called directly rather than through a queued signal, the worker's
+        # thread is busy running the detection
+        self.silence_worker.cancel()
+
+    def _close_processing_dialog(self):
+        # Closing a QProgressDialog emits canceled, which must not reach the worker
+        self.processing_dialog.canceled.disconnect(self.cancel_block_processing)
+        self.processing_dialog.close()
+
+    def on_blocks_progress(self, percent, blocks):
+        """Show the blocks detected so far while the rest of the file is analysed"""
+        if self.processing_dialog.wasCanceled():
+            return
+        self.processing_dialog.setRange(0, 100)
+        self.processing_dialog.setValue(percent)
+        self.block_manager.set_blocks(*blocks)
+        self.block_timeline.setBlocks(self.block_manager.blocks, self._dur_ms / 1000.0)
+
+    def on_blocks_processed(self, blocks):
+        self._close_processing_dialog()
+        self.block_manager.set_blocks(*blocks)
+        self.current_block_index = 0
+        self.last_jumped_block_index = 0
+        self.block_timeline.setBlocks(self.block_manager.blocks, self._dur_ms / 1000.0)
+        self.enable_controls()
+
+    def on_blocks_failed(self, error):
+        self._close_processing_dialog()
+        QMessageBox.warning(self, "Error", f"Failed to process blocks!\n\n{error}")
+
+    def on_blocks_cancelled(self):
+        self._close_processing_dialog()
+        # Drop the partial blocks, like answering No to processing them
+        self.block_manager.set_blocks([], [], [])
+        self.block_timeline.setBlocks(self.block_manager.blocks, self._dur_ms / 1000.0)
+        self.play_pause_button.setEnabled(True)
+        self.load_state_button.setEnabled(True)
+
     def play_pause(self):
         if self.media_player.playbackState() == QMediaPlayer.PlayingState:
             self.media_player.pause()
@@ -592,109 +1119,115 @@ class VideoPlayer(QMainWindow):
             self.media_player.play()
             self.play_pause_button.setText("Pause")
             self.skip_timer.start(100)
+            self._schedule_ui_flush()
 
     def set_position(self, position):
         self.media_player.setPosition(position)
 
     def position_changed(self, position):
+        self._pos_ms = position
         self.timeline_slider.setValue(position)
         current_position = position / 1000.0  # Convert to seconds
-        self.block_timeline.setCurrentPosition(current_position)
+
+        # The timeline and progress bar are refreshed by the UI timer
+        self._pending_position = current_position
+        self._ui_dirty = True
+        self._schedule_ui_flush()
         
         if not self.block_manager.blocks:
             return
             
         # Update current block index based on position
-        new_block_index = next((i for i, block in enumerate(self.block_manager.blocks) 
-                            if block.start <= current_position <= block.end), 0)
+        new_block_index = self.block_manager.find_block_index(current_position)
         
         if new_block_index < len(self.block_manager.blocks):
-            current_block = self.block_manager.blocks[new_block_index]
+            # Read the block arrays directly, this runs on every position change
+            manager = self.block_manager
+            is_silence = manager.is_silence[new_block_index]
             
             # Only log for non-silence blocks or when transitioning blocks
-            if not current_block.is_silence or self.current_block_index != new_block_index:
-                if self.debug:
-                    print(f"[DEBUG] Position {current_position:.3f}s - Block {new_block_index}")
-                    if not current_block.is_silence:
-                        print(f"[DEBUG] Non-silence block: {current_block.start:.3f}s - {current_block.end:.3f}s")
+            if not is_silence or self.current_block_index != new_block_index:
+                logger.debug("Position %.3fs - Block %s", current_position, new_block_index)
+                if not is_silence:
+                    logger.debug("Non-silence block: %.3fs - %.3fs", manager.starts[new_block_index], manager.ends[new_block_index])
             
             # Mark non-silence blocks as visited and update include state
-            if not current_block.is_silence:
-                current_block.visited = True
-                current_block.include = self.green_mode
+            if not is_silence:
+                if self.block_manager.mark_visited(new_block_index, self.green_mode):
+                    self.block_timeline.invalidate()
                 
             # Update current block index
             if self.current_block_index != new_block_index:
                 self.current_block_index = new_block_index
-            
-        self.block_timeline.update()
-        self.update_progress_bar()
+
+    def _schedule_ui_flush(self):
+        if not self.ui_timer.isActive():
+            self.ui_timer.start()
+
+    def _flush_ui(self):
+        """Apply the latest playback position to the timeline and progress bar"""
+        if self._ui_dirty:
+            self._ui_dirty = False
+            self._progress_pending = True
+
+            # This only invalidates the playhead stripe unless the timeline scrolls.
+            # Blocks modified by position_changed already invalidated the timeline.
+            self.block_timeline.setCurrentPosition(self._pending_position)
+
+        # A throttled progress update stays pending, so the last position always lands
+        if self._progress_pending:
+            self._progress_pending = bool(self.block_manager.blocks) and not self.update_progress_bar()
+
+        # Nothing left to apply, position_changed starts the timer again
+        if not self._ui_dirty and not self._progress_pending:
+            self.ui_timer.stop()
 
     def duration_changed(self, duration):
+        self._dur_ms = duration
         self.timeline_slider.setRange(0, duration)
         self.block_timeline.setBlocks(self.block_manager.blocks, duration / 1000.0)
 
-    def find_next_non_silence_block(self, start_index, forward=True):
-        blocks = self.block_manager.blocks
-        if forward:
-            for i in range(start_index + 1, len(blocks)):
-                if not blocks[i].is_silence:
-                    return i
-        else:
-            for i in range(start_index - 1, -1, -1):
-                if not blocks[i].is_silence:
-                    return i
-        return None
-
     def goto_previous_block(self):
-        if self.debug:
-            print(f"[DEBUG] goto_previous_block: Starting from index {self.current_block_index}")
-        next_index = self.find_next_non_silence_block(self.current_block_index, forward=False)
+        logger.debug("goto_previous_block: Starting from index %s", self.current_block_index)
+        next_index = self.block_manager.find_next_non_silence_block(self.current_block_index, forward=False)
         
         if next_index is not None:
             was_playing = self.media_player.playbackState() == QMediaPlayer.PlayingState
-            if self.debug:
-                print(f"[DEBUG] goto_previous_block: Found next block at index {next_index}, was_playing={was_playing}")
+            logger.debug("goto_previous_block: Found next block at index %s, was_playing=%s", next_index, was_playing)
             
             self.current_block_index = next_index
-            target_position = int(self.block_manager.blocks[next_index].start * 1000)
-            if self.debug:
-                print(f"[DEBUG] goto_previous_block: Setting position to {target_position}ms")
+            target_position = int(self.block_manager.starts[next_index] * 1000)
+            logger.debug("goto_previous_block: Setting position to %sms", target_position)
             
             self.media_player.setPosition(target_position)
             
-            if was_playing:
-                if self.debug:
-                    print("[DEBUG] goto_previous_block: Resuming playback")
+            # Seeking doesn't pause the player, only resume if it did stop
+            if was_playing and self.media_player.playbackState() != QMediaPlayer.PlayingState:
+                logger.debug("goto_previous_block: Resuming playback")
                 self.media_player.play()
         else:
-            if self.debug:
-                print("[DEBUG] goto_previous_block: No previous non-silence block found")
+            logger.debug("goto_previous_block: No previous non-silence block found")
 
     def goto_next_block(self):
-        if self.debug:
-            print(f"[DEBUG] goto_next_block: Starting from index {self.current_block_index}")
-        next_index = self.find_next_non_silence_block(self.current_block_index, forward=True)
+        logger.debug("goto_next_block: Starting from index %s", self.current_block_index)
+        next_index = self.block_manager.find_next_non_silence_block(self.current_block_index, forward=True)
         
         if next_index is not None:
             was_playing = self.media_player.playbackState() == QMediaPlayer.PlayingState
-            if self.debug:
-                print(f"[DEBUG] goto_next_block: Found next block at index {next_index}, was_playing={was_playing}")
+            logger.debug("goto_next_block: Found next block at index %s, was_playing=%s", next_index, was_playing)
             
             self.current_block_index = next_index
-            target_position = int(self.block_manager.blocks[next_index].start * 1000)
-            if self.debug:
-                print(f"[DEBUG] goto_next_block: Setting position to {target_position}ms")
+            target_position = int(self.block_manager.starts[next_index] * 1000)
+            logger.debug("goto_next_block: Setting position to %sms", target_position)
             
             self.media_player.setPosition(target_position)
             
-            if was_playing:
-                if self.debug:
-                    print("[DEBUG] goto_next_block: Resuming playback")
+            # Seeking doesn't pause the player, only resume if it did stop
+            if was_playing and self.media_player.playbackState() != QMediaPlayer.PlayingState:
+                logger.debug("goto_next_block: Resuming playback")
                 self.media_player.play()
         else:
-            if self.debug:
-                print("[DEBUG] goto_next_block: No next non-silence block found")
+            logger.debug("goto_next_block: No next non-silence block found")
 
 
     def zoom_in(self):
@@ -722,23 +1255,50 @@ class VideoPlayer(QMainWindow):
             
     def show_processing_dialog(self):
         """Show a progress dialog while processing blocks"""
-        dialog = QProgressDialog("Processing video blocks...", None, 0, 0, self)
+        dialog = QProgressDialog("Processing video blocks...", "Cancel", 0, 0, self)
         dialog.setWindowModality(Qt.WindowModal)
-        dialog.setCancelButton(None)
         dialog.setWindowTitle("Processing")
         dialog.show()
         QApplication.processEvents()
         return dialog
 
     def confirm_export(self):
-        """Show export confirmation dialog with options"""
-        msg = QMessageBox()
-        msg.setWindowTitle("Export Options")
-        msg.setText("Choose export format:")
-        msg.addButton("MP4 (H.264)", QMessageBox.AcceptRole)
-        msg.addButton("WebM", QMessageBox.AcceptRole)
-        msg.addButton("Cancel", QMessageBox.RejectRole)
-        return msg.exec_()
+        """Show export confirmation dialog with options.
+
+        Returns the chosen format ('mp4' or 'webm'), or None if cancelled.
+        """
+        # Built once and reused like the help dialog
+        if self._export_dialog is None:
+            self._export_dialog = QMessageBox(self)
+            self._export_dialog.setWindowTitle("Export Options")
+            self._export_dialog.setText("Choose export format:")
+            self._export_formats = {
+                self._export_dialog.addButton("MP4 (H.264)", QMessageBox.AcceptRole): 'mp4',
+                self._export_dialog.addButton("WebM", QMessageBox.AcceptRole): 'webm',
+            }
+            self._export_dialog.addButton("Cancel", QMessageBox.RejectRole)
+            # Referenced from here as well, the message box doesn't keep it alive
+            self._export_gpu_checkbox = QCheckBox("Use GPU encoder (MP4 only)")
+            self._export_dialog.setCheckBox(self._export_gpu_checkbox)
+        msg = self._export_dialog
+
+        # Only offer the GPU encoder when one actually works on this machine
+        hw_available = detect_hw_encoder('h264') is not None
+        gpu_checkbox = self._export_gpu_checkbox
+        gpu_checkbox.setChecked(hw_available and self.use_hw_encoder)
+        gpu_checkbox.setEnabled(hw_available)
+
+        for button, export_format in self._export_formats.items():
+            if export_format == self.export_format:
+                msg.setDefaultButton(button)
+
+        msg.exec_()
+        clicked = msg.clickedButton()
+        if clicked not in self._export_formats:
+            return None
+        self.use_hw_encoder = gpu_checkbox.isChecked()
+        self.export_format = self._export_formats[clicked]
+        return self.export_format
 
     def show_welcome_screen(self):
         """Show welcome screen with quick actions"""
@@ -751,183 +1311,354 @@ class VideoPlayer(QMainWindow):
         layout.addWidget(label)
         
         open_btn = QPushButton("Open Video")
-        open_btn.clicked.connect(lambda: (welcome.accept(), self.open_file()))
+        open_btn.clicked.connect(lambda: welcome.done(1))
         layout.addWidget(open_btn)
         
         load_btn = QPushButton("Load Previous Session")
-        load_btn.clicked.connect(lambda: (welcome.accept(), self.load_state()))
+        load_btn.clicked.connect(lambda: welcome.done(2))
         layout.addWidget(load_btn)
         
-        welcome.exec()
+        # The chosen action runs from the event loop once the welcome dialog
+        # has closed, so the file dialog doesn't open on top of it
+        result = welcome.exec()
+        if result == 1:
+            QTimer.singleShot(0, self.open_file)
+        elif result == 2:
+            QTimer.singleShot(0, self.load_state)
 
     def show_help(self):
-        help_text = """
-        Hotkeys:
-        - Space: Play/Pause
-        - Left Arrow: Go to Previous Block
-        - Right Arrow: Go to Next Block
-        - T: Toggle Mode (Green/Red)
-        - +: Zoom In
-        - -: Zoom Out
-
-        Buttons:
-        - Open Video: Open a video file
-        - Play/Pause: Control video playback
-        - Previous Block: Move to the previous block
-        - Next Block: Move to the next block
-        - Toggle Mode: Switch between Green (include) and Red (exclude) modes
-        - Save State: Save current block states to a file
-        - Load State: Load previously saved block states
-        - Reset Blocks: Reset all blocks to unvisited state
-        - Export Green Blocks: Export a new video with only included blocks
-        - Zoom In: Increase the number of visible blocks
-        - Zoom Out: Decrease the number of visible blocks
-
-        Modes:
-        - Green Mode: Blocks the playhead passes through will be included
-        - Red Mode: Blocks the playhead passes through will be excluded
-        """
-        QMessageBox.information(self, "Help", help_text)
+        # Built once and reused, the message box layout is the costly part
+        if self._help_dialog is None:
+            self._help_dialog = QMessageBox(self)
+            self._help_dialog.setIcon(QMessageBox.Information)
+            self._help_dialog.setWindowTitle("Help")
+            self._help_dialog.setText(HELP_TEXT)
+        self._help_dialog.exec()
 
     def skip_silence(self):
         if not self.block_manager.blocks:
-            if self.debug:
-                print("[DEBUG] skip_silence: No blocks available")
+            logger.debug("skip_silence: No blocks available")
             return
             
-        current_position = self.media_player.position() / 1000.0
-        if self.debug:
-            print(f"[DEBUG] skip_silence: Current position {current_position:.3f}s")
+        current_position = self._pos_ms / 1000.0
+        logger.debug("skip_silence: Current position %.3fs", current_position)
         
         if self.current_block_index >= len(self.block_manager.blocks):
-            if self.debug:
-                print(f"[DEBUG] skip_silence: Adjusting index from {self.current_block_index} to {len(self.block_manager.blocks) - 1}")
+            logger.debug("skip_silence: Adjusting index from %s to %s", self.current_block_index, len(self.block_manager.blocks) - 1)
             self.current_block_index = len(self.block_manager.blocks) - 1
             
-        current_block = self.block_manager.blocks[self.current_block_index]
+        # Read the block arrays directly, this runs on every skip timer tick
+        manager = self.block_manager
+        index = self.current_block_index
+        block_start = float(manager.starts[index])
+        block_end = float(manager.ends[index])
+        is_silence = manager.is_silence[index]
         
         # Don't skip if we just started playing this block (add 0.1s buffer)
-        if current_position - current_block.start < 0.1:
+        if current_position - block_start < 0.1:
             return
             
-        if self.debug:
-            print(f"[DEBUG] skip_silence: Current block - Index: {self.current_block_index}, Start: {current_block.start:.3f}s, End: {current_block.end:.3f}s, Is Silence: {current_block.is_silence}")
-            print(f"[DEBUG] skip_silence: Time in current block: {current_position - current_block.start:.3f}s")
+        logger.debug("skip_silence: Current block - Index: %s, Start: %.3fs, End: %.3fs, Is Silence: %s", index, block_start, block_end, is_silence)
+        logger.debug("skip_silence: Time in current block: %.3fs", current_position - block_start)
 
-        # Check if we need to skip this block
-        should_skip = current_block.is_silence and not current_block.include
-        
-        # Also skip very short non-silence blocks (less than 0.2 seconds)
-        if not current_block.is_silence:
-            block_duration = current_block.end - current_block.start
-            if block_duration < 0.2:
-                if self.debug:
-                    print(f"[DEBUG] skip_silence: Block too short ({block_duration:.3f}s), will skip")
-                should_skip = True
+        # Skip excluded silence, and very short non-silence blocks
+        if manager.is_too_short(index):
+            logger.debug("skip_silence: Block too short (%.3fs), will skip", block_end - block_start)
+            should_skip = True
+        else:
+            should_skip = is_silence and not manager.include[index]
             
         if should_skip:
             # Find the next suitable non-silence block
-            next_block_index = self.current_block_index + 1
-            min_block_duration = 0.3  # Increased minimum duration for stability
-            
-            while next_block_index < len(self.block_manager.blocks):
-                next_block = self.block_manager.blocks[next_block_index]
-                block_duration = next_block.end - next_block.start
-                
-                # Skip silence blocks and blocks that are too short
-                if not next_block.is_silence and block_duration >= min_block_duration:
-                    if self.debug:
-                        print(f"[DEBUG] skip_silence: Found suitable block {next_block_index} with duration {block_duration:.3f}s")
-                    break
-                    
-                if self.debug and next_block.is_silence:
-                    print(f"[DEBUG] skip_silence: Skipping silence block {next_block_index}")
-                elif self.debug:
-                    print(f"[DEBUG] skip_silence: Skipping short block {next_block_index} ({block_duration:.3f}s)")
-                    
-                next_block_index += 1
-                
+            next_block_index = self.block_manager.find_next_playable_block(self.current_block_index + 1)
             if next_block_index < len(self.block_manager.blocks):
-                next_block = self.block_manager.blocks[next_block_index]
+                logger.debug("skip_silence: Found suitable block %s, skipped %s silence or short blocks", next_block_index, next_block_index - self.current_block_index - 1)
                 # Add a small offset to avoid boundary issues
-                target_position = next_block.start + 0.05
-                if self.debug:
-                    print(f"[DEBUG] skip_silence: Skipping to next suitable block at {target_position:.3f}s")
+                target_position = float(manager.starts[next_block_index]) + 0.05
+                logger.debug("skip_silence: Skipping to next suitable block at %.3fs", target_position)
                 self.media_player.setPosition(int(target_position * 1000))
                 self.current_block_index = next_block_index
             else:
                 # If no more suitable blocks, stop playback
-                if self.debug:
-                    print("[DEBUG] skip_silence: No more suitable blocks, stopping playback")
+                logger.debug("skip_silence: No more suitable blocks, stopping playback")
                 self.media_player.stop()
                 return
             
             playback_state = self.media_player.playbackState()
-            if self.debug:
-                print(f"[DEBUG] skip_silence: Playback state is {playback_state}")
+            logger.debug("skip_silence: Playback state is %s", playback_state)
             
             if playback_state != QMediaPlayer.PlayingState:
-                if self.debug:
-                    print("[DEBUG] skip_silence: Resuming playback")
+                logger.debug("skip_silence: Resuming playback")
                 self.media_player.play()
 
     def update_progress_bar(self):
-        if self.media_player.duration() > 0:
-            progress = (self.media_player.position() / self.media_player.duration()) * 100
-            self.progress_bar.setValue(int(progress))
+        """Show the playback progress, returns False if throttled and not up to date yet"""
+        if self._dur_ms > 0:
+            progress = int((self._pos_ms / self._dur_ms) * 100)
+            if progress == self._last_progress_pct:
+                return True
+            now = self._progress_elapsed.elapsed()
+            if now - self._last_progress_update_ms < 100:
+                return False
+            self._last_progress_pct = progress
+            self._last_progress_update_ms = now
+            self.progress_bar.setValue(progress)
+        return True
+
+class DetectionCancelled(Exception):
+    """Raised by SilenceDetector when detection is cancelled"""
+
+class SilenceWorker(QObject):
+    """Runs SilenceDetector on a background thread and reports the result with signals"""
+    progress = Signal(int, object)
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+    def __init__(self, video_path):
+        super().__init__()
+        self.video_path = video_path
+        self.detector = SilenceDetector(video_path)
+
+    def cancel(self):
+        """Stop the detection, safe to call from any thread"""
+        self.detector.cancel()
+
+    def run(self):
+        try:
+            blocks = self.detector.detect_blocks(
+                progress=lambda fraction, partial: self.progress.emit(int(fraction * 100), partial))
+        except DetectionCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            self.failed.emit(str(e) or type(e).__name__)
+            return
+        self.finished.emit(blocks)
 
 class SilenceDetector:
+    # Parallelism hardly improves past a few ffmpeg processes, and short
+    # chunks mostly pay process startup
+    MAX_WORKERS = 4
+    MIN_CHUNK_DURATION = 60
+    # Seconds between progress reports while a chunk is being analysed
+    PROGRESS_INTERVAL = 0.5
+
     def __init__(self, input_file, silence_threshold=-40, min_silence_duration=0.1):
         self.input_file = input_file
         self.silence_threshold = silence_threshold
         self.min_silence_duration = min_silence_duration
 
-    def detect_blocks(self):
-        ffmpeg_cmd = [
-            "ffmpeg",
+        # Running ffmpeg processes, so cancel() can stop them
+        self._lock = threading.Lock()
+        self._processes = []
+        self._cancelled = False
+
+    def cancel(self):
+        """Stop a running detect_blocks, which raises DetectionCancelled. Thread safe."""
+        with self._lock:
+            self._cancelled = True
+            for process in self._processes:
+                process.terminate()
+
+    def detect_blocks(self, progress=None):
+        """Return the (starts, ends, is_silence) block arrays, cached per file and settings.
+
+        While detecting, progress(fraction, blocks) is called every
+        PROGRESS_INTERVAL seconds with the blocks found so far from the start
+        of the file. Nothing is cached if the detection is cancelled.
+        """
+        cache_path = self._cache_path()
+        if os.path.exists(cache_path):
+            try:
+                with np.load(cache_path) as cached:
+                    return cached['starts'], cached['ends'], cached['is_silence']
+            except Exception as e:
+                logger.warning("Error reading cached blocks: %s", e)
+
+        blocks = self._detect_blocks(progress)
+
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # Write to a temporary file first so a partial entry is never picked up
+            fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, starts=blocks[0], ends=blocks[1], is_silence=blocks[2])
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            logger.warning("Error caching blocks: %s", e)
+
+        return blocks
+
+    def _cache_path(self):
+        """Cache file for this input and these settings, a modified file gets a new key"""
+        stat = os.stat(self.input_file)
+        key = (f"{os.path.abspath(self.input_file)}|{stat.st_mtime_ns}|{stat.st_size}|"
+               f"{self.silence_threshold}|{self.min_silence_duration}")
+        return os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + ".npz")
+
+    def _detect_blocks(self, progress=None):
+        # The chunks have to be planned before ffmpeg runs, so the duration can't
+        # be taken from its log
+        duration = probe_duration(self.input_file)
+
+        # ffmpeg has nothing to analyse without an audio stream (and fails on -vn),
+        # such a video is one block of non-silence
+        if probe_video(self.input_file)['audio_codec'] is None:
+            return self.build_blocks([], [], duration)
+
+        # Long files are split into chunks analysed by concurrent ffmpeg processes
+        workers = max(1, min(os.cpu_count() or 1, self.MAX_WORKERS,
+                             int(duration // self.MIN_CHUNK_DURATION)))
+        chunk_duration = duration / workers
+        offsets = [i * chunk_duration for i in range(workers)]
+        # The last chunk reads to the end of the file, whatever the probed duration
+        lengths = [chunk_duration] * (workers - 1) + [None]
+
+        # Silences are appended to these as soon as ffmpeg logs them
+        found = [[] for _ in offsets]
+
+        silences = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._detect_silences, offset, length, chunk_found)
+                       for offset, length, chunk_found in zip(offsets, lengths, found)]
+
+            # Chunks are taken in order, so everything up to the current one is final
+            for i, (offset, future) in enumerate(zip(offsets, futures)):
+                reported = 0
+                while progress is not None:
+                    try:
+                        future.result(timeout=self.PROGRESS_INTERVAL)
+                        break
+                    except TimeoutError:
+                        pass
+                    if len(found[i]) == reported:
+                        continue
+                    reported = len(found[i])
+                    # Report what is known from the start of the file, up to the
+                    # last silence found in the chunk being waited for
+                    partial = self._stitch(list(silences), offset, found[i][:])
+                    known_end = partial[-1][1] if partial else 0.0
+                    progress(min(known_end / duration, 1.0), self._silences_to_blocks(partial, known_end))
+
+                self._stitch(silences, offset, future.result())
+
+                if progress is not None and i < workers - 1:
+                    progress(offsets[i + 1] / duration, self._silences_to_blocks(silences, offsets[i + 1]))
+
+        return self._silences_to_blocks(silences, duration)
+
+    def _stitch(self, silences, offset, chunk):
+        """Append a chunk's silences, joining one split at the chunk boundary back together"""
+        for start, end in chunk:
+            if (silences and start - offset < self.min_silence_duration
+                    and offset - silences[-1][1] < self.min_silence_duration):
+                silences[-1] = (silences[-1][0], end)
+            else:
+                silences.append((start, end))
+        return silences
+
+    def _silences_to_blocks(self, silences, duration):
+        silence_starts = [start for start, _ in silences]
+        silence_ends = [end for _, end in silences]
+        return self.build_blocks(silence_starts, silence_ends, duration)
+
+    def _detect_silences(self, offset=0.0, length=None, found=None):
+        """Run silencedetect from offset for length seconds (or to the end of the file).
+
+        Returns the silences as (start, end) pairs in seconds from the start of the file.
+        They are also appended to the found list, if given, as soon as ffmpeg logs them.
+        """
+        ffmpeg_cmd = [FFMPEG, "-hide_banner", "-nostats"]
+        if offset:
+            ffmpeg_cmd += ["-ss", f"{offset:.3f}"]
+        if length is not None:
+            ffmpeg_cmd += ["-t", f"{length:.3f}"]
+
+        # Only the audio is analysed: -vn skips decoding video entirely, and the
+        # audio is downmixed to mono and handed to the null muxer as plain PCM
+        ffmpeg_cmd += [
             "-i", self.input_file,
+            "-vn",
+            "-ac", "1",
+            "-c:a", "pcm_s16le",
             "-af", f"silencedetect=noise={self.silence_threshold}dB:d={self.min_silence_duration}",
             "-f", "null",
             "-"
         ]
 
-        result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
-        output = result.stderr
-
         silence_starts = []
         silence_ends = []
-        for line in output.split('\n'):
-            if "silence_start" in line:
-                time = float(line.split("silence_start: ")[1].split(" ")[0])
-                silence_starts.append(time)
-            elif "silence_end" in line:
-                time = float(line.split("silence_end: ")[1].split(" ")[0])
-                silence_ends.append(time)
-
-        # Get the duration of the video
-        duration_cmd = [
-            "ffprobe",
-            "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            self.input_file
-        ]
-        duration_result = subprocess.run(duration_cmd, capture_output=True, text=True)
-        duration = float(duration_result.stdout.strip())
-
-        blocks = []
-        current_time = 0
-
-        for start, end in zip(silence_starts, silence_ends):
-            if start > current_time:
-                blocks.append(AudioBlock(current_time, start, False))
-            blocks.append(AudioBlock(start, end, True))
-            current_time = end
 
+        # Parse the log line by line while ffmpeg is still decoding, rather than
+        # buffering the whole of stderr first. Timestamps restart at 0 after -ss.
+        # The events are ASCII, so the log is scanned as bytes without decoding it.
+        with subprocess.Popen(ffmpeg_cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.PIPE, close_fds=False) as process:
+            with self._lock:
+                if self._cancelled:
+                    process.terminate()
+                self._processes.append(process)
+            try:
+                for line in process.stderr:
+                    match = SILENCE_RE.search(line)
+                    if match:
+                        time = offset + float(match.group(2))
+                        if match.group(1) == b"start":
+                            silence_starts.append(time)
+                        else:
+                            silence_ends.append(time)
+                            if found is not None and silence_starts:
+                                found.append((silence_starts[-1], time))
+            finally:
+                with self._lock:
+                    self._processes.remove(process)
+
+        if self._cancelled:
+            raise DetectionCancelled()
+
+        # A partial result would be shown, and cached, as if it were complete
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, ffmpeg_cmd)
+
+        # A silence still running when a chunk is cut short lasts until the cut
+        if length is not None and len(silence_starts) > len(silence_ends):
+            silence_ends.append(offset + length)
+
+        return list(zip(silence_starts, silence_ends))
+
+    @staticmethod
+    def build_blocks(silence_starts, silence_ends, duration):
+        """Turn silence intervals into (starts, ends, is_silence) block arrays.
+
+        Every silence is preceded by a non-silence block covering the gap
+        since the previous silence (if there is one), and a trailing
+        non-silence block runs up to the end of the video.
+        """
+        count = min(len(silence_starts), len(silence_ends))
+        silence_starts = np.asarray(silence_starts[:count], dtype=np.float64)
+        silence_ends = np.asarray(silence_ends[:count], dtype=np.float64)
+        gap_starts = np.concatenate(([0.0], silence_ends))[:count]
+
+        # Interleave gap/silence pairs, then drop the empty gaps
+        starts = np.empty(2 * count)
+        ends = np.empty(2 * count)
+        is_silence = np.empty(2 * count, dtype=bool)
+        keep = np.empty(2 * count, dtype=bool)
+        starts[0::2], starts[1::2] = gap_starts, silence_starts
+        ends[0::2], ends[1::2] = silence_starts, silence_ends
+        is_silence[0::2], is_silence[1::2] = False, True
+        keep[0::2], keep[1::2] = silence_starts > gap_starts, True
+
+        starts, ends, is_silence = starts[keep], ends[keep], is_silence[keep]
+
+        current_time = silence_ends[-1] if count else 0.0
         if current_time < duration:
-            blocks.append(AudioBlock(current_time, duration, False))
+            starts = np.append(starts, current_time)
+            ends = np.append(ends, duration)
+            is_silence = np.append(is_silence, False)
 
-        return blocks
+        return starts, ends, is_silence
 
 def main():
     import argparse
@@ -935,13 +1666,16 @@ def main():
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     args = parser.parse_args()
 
+    logging.basicConfig(format="[%(levelname)s] %(message)s")
+    logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
+
     if not check_ffmpeg():
         print("Error: ffmpeg is not installed or not found in the system PATH.")
         print("Please install ffmpeg and make sure it's accessible from the command line.")
         return
 
     app = QApplication([])  # Don't pass sys.argv since we parsed it
-    player = VideoPlayer(debug=args.debug)
+    player = VideoPlayer()
     player.show()
     sys.exit(app.exec())
 